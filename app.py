@@ -4,10 +4,14 @@ import os
 from models.recommender import SongRecommender
 from config import DATA_PATH, UI_CONFIG, EXAMPLE_SONGS
 
-# Add custom CSS
+# Add custom CSS, read from disk once rather than on every rerun
+@st.cache_data
+def load_css(path):
+    with open(path) as f:
+        return f.read()
+
 try:
-    with open("assets/styles.css") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    st.markdown(f"<style>{load_css('assets/styles.css')}</style>", unsafe_allow_html=True)
 except Exception:
     st.write("Note: Custom styling not loaded")
 
@@ -30,6 +34,11 @@ def load_recommender():
 
 recommender = load_recommender()
 
+# Cache the small list of search results, the recommender itself stays a shared resource
+@st.cache_data(ttl=3600, show_spinner=False)
+def search_songs(query, limit=10):
+    return load_recommender().search_songs(query, limit=limit)
+
 # App header
 st.title("Song Recommender 🎵")
 
@@ -76,7 +85,7 @@ if st.session_state.show_search:
     # Search box
     col1, col2 = st.columns([3, 1])
     with col1:
-        search_query = st.text_input("Enter a song name or artist", placeholder="Example: Shape of You")
+        search_query = st.text_input("Enter a song name or artist", placeholder="Example: Shape of You", key="search_query")
     with col2:
         st.write("")
         st.write("")
@@ -87,21 +96,15 @@ if st.session_state.show_search:
     example_cols = st.columns(len(EXAMPLE_SONGS))
     for i, example in enumerate(EXAMPLE_SONGS):
         with example_cols[i]:
-            if st.button(example, key=f"example_{i}"):
-                st.session_state.search_query = example
-                st.experimental_rerun()
+            # Fill the search box from a callback, the click already triggers the rerun
+            st.button(example, key=f"example_{i}",
+                      on_click=lambda e=example: st.session_state.update(search_query=e))
     
     # Process search
-    if search_query or ('search_query' in st.session_state and st.session_state.search_query):
-        # Use session state if available
-        if 'search_query' in st.session_state:
-            search_query = st.session_state.search_query
-            # Clear after use
-            st.session_state.search_query = ""
-            
+    if search_query:
         with st.spinner("Searching..."):
             if recommender:
-                results = recommender.search_songs(search_query, limit=10)
+                results = search_songs(search_query, limit=10)
                 if results:
                     st.success(f"Found {len(results)} songs matching '{search_query}'")
                     
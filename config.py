@@ -25,8 +25,7 @@ AUDIO_FEATURES = [
 # Model parameters
 MODEL_PARAMS = {
     'similarity_metric': 'cosine',
-    'default_recommendations': 5,
-    'batch_size': 1000  # For memory-efficient processing
+    'default_recommendations': 5
 }
 
 # UI configurations
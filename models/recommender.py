@@ -1,7 +1,102 @@
 import pandas as pd 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import os 
+import re
+
+# optional approximate nearest-neighbour backends, annoy is preferred and
+# hnswlib is used when annoy is not installed
+try:
+    from annoy import AnnoyIndex
+except ImportError:
+    AnnoyIndex = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+ANN_TREES = 20
+#annoy inspects n_trees * k nodes by default, which misses neighbours for small k
+ANN_MIN_CANDIDATES = 100
+
+#int8 scores only shortlist songs, this many per result are rescored in float32
+RERANK_FACTOR = 8
+
+#words are runs of letters and digits in any script
+_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+#odd multiplier of the polynomial hash that identifies words, arithmetic wraps at 2**64
+_WORD_HASH_BASE = np.uint64(1000003)
+
+
+def _is_fresh(index_path, source_path):
+    """check if a derived file exists and is newer than the data it was built from"""
+    return os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(source_path)
+
+
+#the kernels are serial on purpose: sessions and the prefetch worker call them from several
+#threads, which numba's default workqueue threading layer can't handle for parallel kernels,
+#and a nine-wide dot product is bound by memory bandwidth anyway
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _dot_all(q, D, out):
+        """dot product of q with every row of D, written into out"""
+        for i in range(D.shape[0]):
+            s = 0.0
+            for k in range(D.shape[1]):
+                s += q[k] * D[i, k]
+            out[i] = s
+    
+    @njit(cache=True)
+    def _cos_all_int8(q, qn, D, norms, out):
+        """cosine similarity of an int8 query against every int8 row of D, accumulated in int32"""
+        for i in range(D.shape[0]):
+            s = np.int32(0)
+            for k in range(D.shape[1]):
+                s += np.int32(q[k]) * np.int32(D[i, k])
+            out[i] = s / (qn * norms[i] + 1e-12)
+else:
+    def _dot_all(q, D, out):
+        """dot product of q with every row of D, written into out"""
+        np.dot(D, q, out=out)
+
+
+def _quantize(features):
+    """quantize features to int8 with one shared scale, which keeps cosine similarity intact"""
+    scale = 127 / max(float(np.abs(features).max()), 1e-12)
+    quantized = np.round(features * scale).astype(np.int8)
+    return quantized, np.linalg.norm(quantized.astype(np.float32), axis=1)
+
+
+def _pack_trigrams(first, second, third, bits):
+    """pack three arrays of character numbers below 2**bits into one uint64 per trigram"""
+    return (first << np.uint64(2 * bits)) | (second << np.uint64(bits)) | third
+
+
+def _sorted_unique(values):
+    """sorted distinct values, a plain sort is much faster than np.unique's hashing on large integer arrays"""
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]]] if len(values) else values
+
+
+def _lower_strings(column):
+    """lowercase a text column into a numpy string array, missing values become empty strings"""
+    return np.array(column.fillna('').astype(str).str.lower(), dtype=np.dtypes.StringDType())
+
+
+def _top_k(sims, k):
+    """indices of the k highest similarities in descending order, without sorting the whole array"""
+    k = min(k, len(sims))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    #partition for the k largest directly, negating only the k survivors avoids an N-sized copy
+    top = np.argpartition(sims, len(sims) - k)[len(sims) - k:]
+    return top[np.argsort(-sims[top], kind='stable')]
+
 
 class SongRecommender:
     """
@@ -12,114 +107,431 @@ class SongRecommender:
     def __init__(self, feature_matrix_path=None):
         """initialize the recommender with a path to the feature matrix"""
         self.feature_matrix=None
+        self.index = None
+        self._X = None
+        self._Xn = None
+        self._Xq = None
+        self._q_norms = None
+        self._track_names = None
+        self._artist_names = None
+        self._track_lower = None
+        self._artist_lower = None
+        self._search_field = None
+        self._alphabet = None
+        self._rank_bits = 0
+        self._gram_codes = None
+        self._gram_offsets = None
+        self._gram_rows = None
+        self._word_hashes = None
+        self._word_rows = None
+        self._name_artist_to_idx = {}
+        self._name_to_idx = {}
         self.audio_features= ['acousticness', 'danceability', 'energy', 
                                'instrumentalness', 'liveness', 'loudness', 
                                'speechiness', 'tempo', 'valence']
         if feature_matrix_path and os.path.exists(feature_matrix_path):
             self.load_data(feature_matrix_path)
     def load_data(self, feature_matrix_path):
-        """load the feature matrix from a CSV file"""
-        self.feature_matrix = pd.read_csv(feature_matrix_path)
-        if not set(self.audio_features).issubset(self.feature_matrix.columns):
-            raise ValueError("Feature matrix must contain the following audio features: " + ", ".join(self.audio_features))
-        print(f"Feature matrix loaded with shape: {self.feature_matrix.shape}")
+        """load the feature matrix from a CSV file, or from its binary copy when that is up to date"""
+        base_path = os.path.splitext(feature_matrix_path)[0]
+        metadata_path = base_path + '.parquet'
+        features_path = base_path + '.npy'
+        
+        is_fresh = _is_fresh(metadata_path, feature_matrix_path) and _is_fresh(features_path, feature_matrix_path)
+        if not (is_fresh and self._load_binary_copy(metadata_path, features_path)):
+            self._load_csv(feature_matrix_path)
+            self._save_binary_copy(metadata_path, features_path)
+        print(f"Feature matrix loaded with {len(self.feature_matrix)} songs")
+        
+        #unit-length rows turn cosine similarity into a plain dot product
+        norms = np.linalg.norm(self._X, axis=1, keepdims=True)
+        self._Xn = np.ascontiguousarray(self._X / np.maximum(norms, 1e-12))
+        
+        #plain arrays of the displayed metadata, indexing them is much cheaper than building Series
+        self._track_names = self.feature_matrix['track_name'].to_numpy(dtype=object)
+        self._artist_names = self.feature_matrix['artists'].to_numpy(dtype=object)
+        
+        #lowercase the search columns once, variable-width strings keep long titles cheap
+        self._track_lower = _lower_strings(self.feature_matrix['track_name'])
+        self._artist_lower = _lower_strings(self.feature_matrix['artists'])
+        self._search_field = np.strings.add(np.strings.add(self._track_lower, ' '), self._artist_lower)
+        self._build_search_index()
+        
+        #exact track and (track, artist) lookups, the first row wins for duplicated songs
+        self._name_artist_to_idx = {}
+        self._name_to_idx = {}
+        for i, (track, artist) in enumerate(zip(self._track_lower.tolist(), self._artist_lower.tolist())):
+            self._name_artist_to_idx.setdefault((track, artist), i)
+            self._name_to_idx.setdefault(track, i)
+        
+        self._build_index(feature_matrix_path)
+        if self.index is None and njit is not None:
+            #a quarter of the float32 memory traffic for the exhaustive scan, only needed without an index
+            self._Xq, self._q_norms = _quantize(self._X)
+        
+        #the recommender is shared between sessions, so nothing may write into its arrays
+        for array in (self._X, self._Xn, self._Xq, self._q_norms):
+            if array is not None:
+                array.flags.writeable = False
+        
+        if self._Xq is not None and len(self._Xn):
+            self._warm_up_kernels()
         return self
     
+    def _warm_up_kernels(self):
+        """run both exact search paths once so numba compiles while loading, not on the first query"""
+        self._exact_similar_songs(0, 1)
+        self._exact_search(np.array(self._Xn[0]), 1)
+    
+    def _load_csv(self, feature_matrix_path):
+        """parse the feature matrix CSV into the metadata DataFrame and the feature array"""
+        feature_matrix = pd.read_csv(feature_matrix_path)
+        if not set(self.audio_features).issubset(feature_matrix.columns):
+            raise ValueError("Feature matrix must contain the following audio features: " + ", ".join(self.audio_features))
+        
+        #keep the features as one contiguous float32 array and only metadata in the DataFrame
+        self._X = np.ascontiguousarray(feature_matrix[self.audio_features].to_numpy(dtype=np.float32))
+        self.feature_matrix = feature_matrix.drop(columns=self.audio_features)
+    
+    def _load_binary_copy(self, metadata_path, features_path):
+        """load the parquet/.npy copy, returns False when it can't be used"""
+        try:
+            feature_matrix = pd.read_parquet(metadata_path)
+            #memory-map the features so they are paged in from disk instead of parsed
+            features = np.asarray(np.load(features_path, mmap_mode='r'))
+        except ImportError:
+            return False
+        except Exception as e:
+            #a truncated or corrupt copy is rebuilt from the CSV
+            print(f"Could not load binary copy of the feature matrix, reading the CSV instead: {e}")
+            return False
+        
+        if features.shape != (len(feature_matrix), len(self.audio_features)):
+            return False
+        
+        self.feature_matrix = feature_matrix
+        self._X = features
+        return True
+    
+    def _save_binary_copy(self, metadata_path, features_path):
+        """save the metadata as parquet and the features as .npy so later loads skip CSV parsing"""
+        #write to temporary files and move them into place, so an interrupted save never leaves a partial copy
+        metadata_tmp = metadata_path + '.tmp'
+        features_tmp = features_path + '.tmp'
+        try:
+            self.feature_matrix.to_parquet(metadata_tmp, index=False)
+            with open(features_tmp, 'wb') as f:
+                np.save(f, self._X)
+            os.replace(features_tmp, features_path)
+            os.replace(metadata_tmp, metadata_path)
+        except Exception as e:
+            #e.g. pyarrow missing, a read-only directory or object columns mixing ints and strings
+            print(f"Could not save binary copy of the feature matrix: {e}")
+        finally:
+            for tmp_path in (metadata_tmp, features_tmp):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    def _build_search_index(self):
+        """build trigram and word posting arrays with vectorised numpy, so loading needs no per-song python"""
+        #one code point array for every song, songs are separated by a NUL
+        lengths = np.strings.str_len(self._search_field)
+        joined = '\0'.join(self._search_field.tolist()) + '\0'
+        codes = np.frombuffer(joined.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        rows = np.repeat(np.arange(len(lengths), dtype=np.uint64), lengths + 1)
+        separators = np.zeros(len(codes), dtype=bool)
+        separators[np.cumsum(lengths + 1) - 1] = True
+        
+        #number the distinct characters from 1, separators are 0, so a trigram packs into one integer
+        self._alphabet = _sorted_unique(codes[~separators])
+        ranks = (np.searchsorted(self._alphabet, codes) + 1).astype(np.uint64)
+        ranks[separators] = 0
+        self._rank_bits = len(self._alphabet).bit_length()
+        grams = _pack_trigrams(ranks[:-2], ranks[1:-1], ranks[2:], self._rank_bits)
+        valid = (ranks[:-2] != 0) & (ranks[1:-1] != 0) & (ranks[2:] != 0)
+        grams, gram_rows = grams[valid], rows[:-2][valid]
+        
+        #sort by trigram then song and drop repeats within a song, so every posting list is sorted and unique
+        row_bits = max(len(lengths).bit_length(), 1)
+        if 3 * self._rank_bits + row_bits <= 64:
+            keys = _sorted_unique((grams << np.uint64(row_bits)) | gram_rows)
+            grams, gram_rows = keys >> np.uint64(row_bits), keys & np.uint64((1 << row_bits) - 1)
+        else:
+            order = np.lexsort((gram_rows, grams))
+            grams, gram_rows = grams[order], gram_rows[order]
+            keep = np.r_[True, (grams[1:] != grams[:-1]) | (gram_rows[1:] != gram_rows[:-1])]
+            grams, gram_rows = grams[keep], gram_rows[keep]
+        
+        starts = np.flatnonzero(np.r_[True, grams[1:] != grams[:-1]]) if len(grams) else np.empty(0, dtype=np.intp)
+        self._gram_codes = grams[starts]
+        self._gram_offsets = np.r_[starts, len(grams)]
+        self._gram_rows = gram_rows.astype(np.intp)
+        
+        #words are runs of letters and digits like _TOKEN_PATTERN, each is stored as a hash and its song
+        is_word = np.r_[False, [chr(c).isalnum() for c in self._alphabet.tolist()]][ranks.astype(np.intp)]
+        word = np.r_[False, is_word, False]
+        word_starts = np.flatnonzero(word[1:-1] & ~word[:-2])
+        word_lengths = np.flatnonzero(word[1:-1] & ~word[2:]) + 1 - word_starts
+        hashes = np.zeros(len(word_starts), dtype=np.uint64)
+        for k in range(int(word_lengths.max(initial=0))):
+            longer = word_lengths > k
+            hashes[longer] = hashes[longer] * _WORD_HASH_BASE + codes[word_starts[longer] + k]
+        self._word_hashes = hashes
+        self._word_rows = rows[word_starts].astype(np.intp)
+    
+    def _search_candidates(self, query):
+        """rows that contain every trigram of the query, a superset of the substring matches"""
+        codes = np.array([ord(c) for c in query], dtype=np.uint32)
+        ranks = np.searchsorted(self._alphabet, codes)
+        if np.any(ranks >= len(self._alphabet)) or np.any(self._alphabet[np.minimum(ranks, len(self._alphabet) - 1)] != codes):
+            #a character no song contains
+            return np.empty(0, dtype=np.intp)
+        
+        ranks = (ranks + 1).astype(np.uint64)
+        grams = np.unique(_pack_trigrams(ranks[:-2], ranks[1:-1], ranks[2:], self._rank_bits))
+        pos = np.searchsorted(self._gram_codes, grams)
+        if np.any(pos >= len(self._gram_codes)) or np.any(self._gram_codes[np.minimum(pos, len(self._gram_codes) - 1)] != grams):
+            return np.empty(0, dtype=np.intp)
+        
+        lists = [self._gram_rows[self._gram_offsets[i]:self._gram_offsets[i + 1]] for i in pos.tolist()]
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        return candidates
+    
+    def _word_rows_for(self, token):
+        """songs containing the token as a whole word, may repeat a song"""
+        h = 0
+        for c in token:
+            h = (h * int(_WORD_HASH_BASE) + ord(c)) % (1 << 64)
+        return self._word_rows[self._word_hashes == np.uint64(h)]
+    
+    def _build_index(self, feature_matrix_path):
+        """build the nearest-neighbour index, reusing the copy saved next to the CSV when it is up to date"""
+        if AnnoyIndex is None and hnswlib is None:
+            self.index = None
+            return
+        
+        features = self._Xn
+        base_path = os.path.splitext(feature_matrix_path)[0]
+        
+        if AnnoyIndex is not None:
+            self.index = self._build_annoy_index(features, base_path + '.ann', feature_matrix_path)
+        else:
+            self.index = self._build_hnsw_index(features, base_path + '.hnsw', feature_matrix_path)
+    
+    def _build_annoy_index(self, features, index_path, feature_matrix_path):
+        """build an annoy index, angular distance on unit vectors is equivalent to cosine"""
+        if _is_fresh(index_path, feature_matrix_path):
+            index = AnnoyIndex(features.shape[1], 'angular')
+            try:
+                index.load(index_path)
+                if index.get_n_items() == len(features):
+                    return index
+            except OSError as e:
+                #a truncated or corrupt file is rebuilt below
+                print(f"Could not load index from {index_path}, rebuilding it: {e}")
+            index.unload()
+        
+        index = AnnoyIndex(features.shape[1], 'angular')
+        for i, row in enumerate(features):
+            index.add_item(i, row)
+        index.build(ANN_TREES)
+        #save to a temporary file and move it into place, so an interrupted save never leaves a partial index
+        try:
+            index.save(index_path + '.tmp')
+            os.replace(index_path + '.tmp', index_path)
+        except OSError:
+            print(f"Could not save index to {index_path}, it will be rebuilt on the next load")
+            if os.path.exists(index_path + '.tmp'):
+                os.remove(index_path + '.tmp')
+        return index
+    
+    def _build_hnsw_index(self, features, index_path, feature_matrix_path):
+        """build an hnswlib index with cosine space as a fallback when annoy is unavailable"""
+        if _is_fresh(index_path, feature_matrix_path):
+            index = hnswlib.Index(space='cosine', dim=features.shape[1])
+            try:
+                index.load_index(index_path, max_elements=len(features))
+                if index.get_current_count() == len(features):
+                    return index
+            except (OSError, RuntimeError) as e:
+                #a truncated or corrupt file is rebuilt below
+                print(f"Could not load index from {index_path}, rebuilding it: {e}")
+        
+        index = hnswlib.Index(space='cosine', dim=features.shape[1])
+        index.init_index(max_elements=len(features), ef_construction=200, M=16)
+        index.add_items(features, np.arange(len(features)))
+        try:
+            index.save_index(index_path + '.tmp')
+            os.replace(index_path + '.tmp', index_path)
+        except (OSError, RuntimeError):
+            print(f"Could not save index to {index_path}, it will be rebuilt on the next load")
+            if os.path.exists(index_path + '.tmp'):
+                os.remove(index_path + '.tmp')
+        return index
+    
+    def _query_index(self, song_idx, k):
+        """return the ids and cosine similarities of the k nearest neighbours of a song"""
+        if AnnoyIndex is not None and isinstance(self.index, AnnoyIndex):
+            ids, distances = self.index.get_nns_by_item(
+                song_idx, k, search_k=ANN_TREES * max(k, ANN_MIN_CANDIDATES), include_distances=True
+            )
+            # angular distance between unit vectors is sqrt(2 - 2 * cos)
+            return ids, [1 - d * d / 2 for d in distances]
+        
+        return self._query_index_by_vector(np.asarray(self.index.get_items([song_idx])[0], dtype=np.float32), k)
+    
+    def _query_index_by_vector(self, vector, k):
+        """return the ids and cosine similarities of the k nearest neighbours of a unit query vector"""
+        if AnnoyIndex is not None and isinstance(self.index, AnnoyIndex):
+            ids, distances = self.index.get_nns_by_vector(
+                vector, k, search_k=ANN_TREES * max(k, ANN_MIN_CANDIDATES), include_distances=True
+            )
+            return ids, [1 - d * d / 2 for d in distances]
+        
+        self.index.set_ef(max(64, k))
+        labels, distances = self.index.knn_query(vector[None, :], k=k)
+        # hnswlib cosine distance is 1 - cos
+        return labels[0].tolist(), (1 - distances[0]).tolist()
+    
     def search_songs(self , query , limit=10):
         if self.feature_matrix is None:
             raise ValueError("Feature matrix is not loaded")
         
-        #combining song name and artist for search
-        self.feature_matrix['search_field'] =  (
-            self.feature_matrix['track_name'].str.lower() + ' ' + 
-            self.feature_matrix['artists'].str.lower()
-        )
-        
-        #filter words that match the query 
         query = query.lower()
-        matches = self.feature_matrix[self.feature_matrix['search_field'].str.contains(query , na=False)]
+        if len(query) < 3:
+            #too short for trigrams, scan every song
+            idx = np.flatnonzero(np.strings.find(self._search_field, query) >= 0)
+        else:
+            idx = self._search_candidates(query)
+            idx = idx[np.strings.find(self._search_field[idx], query) >= 0]
         
-        return matches.head(limit)[['track_name', 'artists']].to_dict(orient='records')
+        #songs containing more of the query's whole words come first, ties keep dataset order
+        tokens = set(_TOKEN_PATTERN.findall(query))
+        if tokens and len(idx) > 1:
+            score = sum(np.isin(idx, self._word_rows_for(token)).astype(np.intp) for token in tokens)
+            idx = idx[np.argsort(-score, kind='stable')]
+        
+        idx = idx[:limit]
+        return [
+            {'track_name': track_name, 'artists': artists}
+            for track_name, artists in zip(self._track_names[idx], self._artist_names[idx])
+        ]
        
     def get_song_by_name_and_artist(self , track_name, artist_name):
         """get a song by its name and artist"""
         if self.feature_matrix is None:
             raise ValueError("Feature matrix is not loaded")
         
-        track_name = track_name.lower()
-        artist_name = artist_name.lower()
-        
-        song = self.feature_matrix[
-            (self.feature_matrix['track_name'].str.lower() == track_name) & 
-            (self.feature_matrix['artists'].str.lower() == artist_name)
-        ]
-        
-        if song.empty:
+        idx = self._name_artist_to_idx.get((track_name.lower(), artist_name.lower()))
+        if idx is None:
             return None
         
-        return song.iloc[0].to_dict()
+        song = self.feature_matrix.iloc[idx].to_dict()
+        song.update(self.get_song_features(idx))
+        return song
     
     def get_song_features(self, song_idx):
         """Get audio features for a specific song"""
         if self.feature_matrix is None or song_idx >= len(self.feature_matrix):
             return None
             
-        song = self.feature_matrix.iloc[song_idx]
-        features = {feature: song[feature] for feature in self.audio_features if feature in song.index}
-        return features
+        return dict(zip(self.audio_features, self._X[song_idx].tolist()))
 
     def _get_similar_songs(self, song_idx, n=5):
         """get similar songs to a given song """
         if self.feature_matrix is None or song_idx >= len(self.feature_matrix):
             raise ValueError("Feature matrix is not loaded or index is out of bounds")
         
-        song_features = self.feature_matrix.iloc[song_idx][self.audio_features].values.reshape(1, -1)
+        if self.index is not None:
+            ids, sims = self._query_index(int(song_idx), n + 1)
+            neighbours = [(idx, sim) for idx, sim in zip(ids, sims) if idx != song_idx][:n]
+            ids = [idx for idx, _ in neighbours]
+            sims = [sim for _, sim in neighbours]
+        else:
+            ids, sims = self._exact_similar_songs(song_idx, n)
         
-        #calculate cosine similarity with all the songs (mermory efficient approach)
-        batch_size = 1000
-        all_similarities = []
-        
-        for i in range (0, len(self.feature_matrix), batch_size):
-            batch = self.feature_matrix.iloc[i:i + batch_size]
-            batch_features = batch[self.audio_features].values
-            
-            similarities = cosine_similarity(song_features, batch_features)[0]
-            
-            for j, sim in enumerate(similarities):
-                all_similarities.append((i + j, sim))
-                
-        all_similarities.sort(key=lambda x: x[1], reverse=True)   
-        similar_indices = [idx for idx,_ in all_similarities[1:n+1]]  
-        similar_songs = []
-        for idx in similar_indices:
-            song = self.feature_matrix.iloc[idx]
-            sim_score = next(score for song_idx, score in all_similarities if song_idx == idx)
-
-            similar_songs.append({
-                'track_name': song['track_name'],
-                'artists': song['artists'],
-                'similarity_score': sim_score
-            })   
-            
+        return self._scored_songs(ids, sims)
+    
+    def _scored_songs(self, ids, sims):
+        """result dicts for the given rows, gathering the metadata at once instead of one .iloc per song"""
+        ids = np.asarray(ids, dtype=np.intp)
+        return [
+            {'track_name': track_name, 'artists': artists, 'similarity_score': sim_score}
+            for track_name, artists, sim_score in zip(self._track_names[ids], self._artist_names[ids], sims)
+        ]
+    
+    def _exact_similar_songs(self, song_idx, n):
+        """exhaustive cosine scan, used when no nearest-neighbour backend is installed"""
+        quantized = None if self._Xq is None else (self._Xq[song_idx], self._q_norms[song_idx])
+        return self._exact_search(self._Xn[song_idx], n, exclude=song_idx, quantized=quantized)
+    
+    def _exact_search(self, query, n, exclude=None, quantized=None):
+        """top n rows by cosine similarity to a unit query, optionally skipping one row"""
+        if self._Xq is None:
+            sims = np.empty(len(self._Xn), dtype=np.float32)
+            _dot_all(query, self._Xn, sims)
+            if exclude is not None:
+                sims[exclude] = -np.inf
             
-        return similar_songs
+            top = _top_k(sims, n)
+            if exclude is not None:
+                top = top[top != exclude]
+            return top, sims[top].tolist()
+        
+        #cosine ignores the scale, so a query can be quantized on its own
+        if quantized is None:
+            q, q_norm = _quantize(query[None, :])
+            quantized = (q[0], q_norm[0])
+        
+        #shortlist with the int8 kernel, then rescore the shortlist exactly
+        coarse = np.empty(len(self._Xq), dtype=np.float32)
+        _cos_all_int8(quantized[0], quantized[1], self._Xq, self._q_norms, coarse)
+        if exclude is not None:
+            coarse[exclude] = -np.inf
+        candidates = _top_k(coarse, max(RERANK_FACTOR * n, 64))
+        if exclude is not None:
+            #on small datasets the shortlist covers every song, the excluded one included
+            candidates = candidates[candidates != exclude]
+        
+        sims = np.empty(len(candidates), dtype=np.float32)
+        _dot_all(query, self._Xn[candidates], sims)
+        top = _top_k(sims, n)
+        return candidates[top], sims[top].tolist()
     
+    def recommend_by_features(self, feature_values, n=10):
+        """recommend songs whose audio features are most similar to the given feature values"""
+        if self.feature_matrix is None:
+            raise ValueError("Feature matrix is not loaded")
+        
+        missing = [feature for feature in self.audio_features if feature not in feature_values]
+        if missing:
+            raise ValueError("Feature values must contain the following audio features: " + ", ".join(missing))
+        
+        query = np.array([feature_values[feature] for feature in self.audio_features], dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        
+        if self.index is not None:
+            ids, sims = self._query_index_by_vector(query, n)
+        else:
+            ids, sims = self._exact_search(query, n)
+        return self._scored_songs(ids, sims)
     
     def recommend_by_song_name(self , track_name , artist_name=None, n=5):
         """recommend songs similar to a given song name and artist"""
         if self.feature_matrix is None:
             raise ValueError("Feature matrix is not loaded")
         
-        matches= self.feature_matrix[
-            self.feature_matrix['track_name'].str.lower() == track_name.lower()
-        ]
-        if artist_name and not matches.empty:
-            artist_matches= matches[
-                matches['artists'].str.lower() == artist_name.lower()
-            ]
-        if matches.empty:
+        song_idx = None
+        if artist_name:
+            song_idx = self._name_artist_to_idx.get((track_name.lower(), artist_name.lower()))
+        if song_idx is None:
+            #no artist given or no song by that artist, use the first song with this name
+            song_idx = self._name_to_idx.get(track_name.lower())
+        if song_idx is None:
             raise ValueError(f"Song '{track_name}' not found")    
-        song_idx = matches.index[0]
         return self._get_similar_songs(song_idx, n)
     
     
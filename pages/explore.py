@@ -11,6 +11,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
+import plotly.graph_objects as go
 import os
 import sys
 from pathlib import Path
@@ -26,8 +27,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load the dataset
-@st.cache_data
+# Load the dataset once and share it read-only, cache_data would hash and copy it on every rerun
+@st.cache_resource
 def load_data():
     """Load the processed dataset"""
     try:
@@ -37,6 +38,46 @@ def load_data():
         st.error(f"Error loading data: {e}")
         return None
 
+# Cached computations, the dataset never changes so it is excluded from the cache key
+@st.cache_data
+def sample_songs(_df, n, seed=0):
+    """Sample songs for the scatter plot"""
+    return _df.sample(min(n, len(_df)), random_state=seed)
+
+@st.cache_data
+def feature_correlations(_df, features):
+    """Correlation matrix of the given features"""
+    return _df[list(features)].corr()
+
+@st.cache_data
+def feature_stats(_df, features):
+    """Mean, median, min and max of each feature"""
+    return _df[list(features)].agg(['mean', 'median', 'min', 'max']).to_dict()
+
+@st.cache_data
+def feature_histogram(_df, feature, bins=50):
+    """Histogram counts and bin edges of a feature"""
+    return np.histogram(_df[feature].dropna(), bins=bins)
+
+@st.cache_data
+def scatter_figure(_df, feature_x, feature_y):
+    """Scatter plot of two features over the cached sample, built once per pair"""
+    return px.scatter(
+        sample_songs(_df, 1000),  # Sample for better performance
+        x=feature_x,
+        y=feature_y,
+        hover_data=['track_name', 'artists'] if 'track_name' in _df.columns else None,
+        opacity=0.7,
+        title=f"{feature_x.title()} vs {feature_y.title()}"
+    )
+
+@st.cache_data
+def top_songs(_df, feature, sort_order, columns, n=10):
+    """Songs with the highest or lowest value of a feature, without sorting the whole dataset"""
+    if sort_order == "Highest":
+        return _df.nlargest(n, feature)[list(columns)]
+    return _df.nsmallest(n, feature)[list(columns)]
+
 # Main function
 def main():
     # Header
@@ -88,27 +129,31 @@ def main():
     
     with tab1:
         st.subheader(f"Distribution of {selected_feature.title()}")
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.histplot(df[selected_feature], kde=True, ax=ax)
-        plt.title(f"Distribution of {selected_feature.title()}")
-        plt.xlabel(selected_feature.title())
-        plt.ylabel("Count")
-        st.pyplot(fig)
+        counts, edges = feature_histogram(df, selected_feature)
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+        fig.update_layout(
+            title=f"Distribution of {selected_feature.title()}",
+            xaxis_title=selected_feature.title(),
+            yaxis_title="Count",
+            bargap=0
+        )
+        st.plotly_chart(fig)
         
         st.write(f"**Description:** {get_feature_description(selected_feature)}")
         
         # Feature stats
+        stats = feature_stats(df, tuple(available_features))[selected_feature]
         col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Average", f"{df[selected_feature].mean():.2f}")
-        col2.metric("Median", f"{df[selected_feature].median():.2f}")
-        col3.metric("Min", f"{df[selected_feature].min():.2f}")
-        col4.metric("Max", f"{df[selected_feature].max():.2f}")
+        col1.metric("Average", f"{stats['mean']:.2f}")
+        col2.metric("Median", f"{stats['median']:.2f}")
+        col3.metric("Min", f"{stats['min']:.2f}")
+        col4.metric("Max", f"{stats['max']:.2f}")
     
     with tab2:
         st.subheader("Feature Correlations")
         
         # Create correlation matrix
-        corr = df[available_features].corr()
+        corr = feature_correlations(df, tuple(available_features))
         
         # Plot heatmap
         fig, ax = plt.subplots(figsize=(10, 8))
@@ -124,15 +169,7 @@ def main():
                 format_func=lambda x: x.title()
             )
             
-            fig = px.scatter(
-                df.sample(min(1000, len(df))),  # Sample for better performance
-                x=selected_feature,
-                y=second_feature,
-                hover_data=['track_name', 'artists'] if 'track_name' in df.columns else None,
-                opacity=0.7,
-                title=f"{selected_feature.title()} vs {second_feature.title()}"
-            )
-            st.plotly_chart(fig)
+            st.plotly_chart(scatter_figure(df, selected_feature, second_feature))
     
     with tab3:
         st.subheader(f"Top Songs by {selected_feature.title()}")
@@ -148,13 +185,7 @@ def main():
         display_cols = ['track_name', 'artists'] if all(col in df.columns for col in ['track_name', 'artists']) else df.columns[:2].tolist()
         display_cols.append(selected_feature)
         
-        # Sort and display
-        if sort_order == "Highest":
-            top_songs = df.sort_values(by=selected_feature, ascending=False).head(10)
-        else:
-            top_songs = df.sort_values(by=selected_feature, ascending=True).head(10)
-        
-        st.dataframe(top_songs[display_cols])
+        st.dataframe(top_songs(df, selected_feature, sort_order, tuple(display_cols)))
 
 # Helper functions
 def get_feature_description(feature):
@@ -9,15 +9,15 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import random
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from sklearn.metrics.pairwise import cosine_similarity
 
 # Add the root directory to the path to import from parent directory
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DATA_PATH, AUDIO_FEATURES, MODEL_PARAMS
+from config import DATA_PATH, AUDIO_FEATURES
 from models.recommender import SongRecommender
 
 # Page configuration
@@ -38,6 +38,98 @@ def load_recommender():
 
 recommender = load_recommender()
 
+# Cache the small lists of search results, typing or moving a slider reruns the whole page
+@st.cache_data(max_entries=256, ttl=600, show_spinner=False)
+def search_songs(query, limit=10):
+    return load_recommender().search_songs(query, limit=limit)
+
+# A single background worker shared by all sessions, for speculative feature searches.
+# It runs alongside the session threads, which is safe because the recommender's kernels are serial
+@st.cache_resource
+def prefetch_executor():
+    return ThreadPoolExecutor(max_workers=1)
+
+# Angle of each radar chart axis, one per audio feature, with the first repeated to close the loop
+ANGLES = np.linspace(0, 2 * np.pi, len(AUDIO_FEATURES), endpoint=False)
+ANGLES = np.append(ANGLES, ANGLES[0])
+
+# Radar chart of the chosen feature values, only redrawn when a slider actually changes
+@st.cache_data(max_entries=32, show_spinner=False)
+def radar_chart(features, values):
+    fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
+    
+    # Values for each axis
+    values = np.append(values, values[0])  # Close the loop
+    
+    # Draw the chart
+    ax.plot(ANGLES, values, linewidth=2, linestyle='solid')
+    ax.fill(ANGLES, values, alpha=0.25)
+    
+    # Set labels
+    ax.set_xticks(ANGLES[:-1], [f.title() for f in features], size=8)
+    
+    # Detach the figure from pyplot, the cache keeps its own copy
+    plt.close(fig)
+    return fig
+
+# Build a playlist around a seed song. The random picks are seeded from the inputs,
+# so the same inputs always give the same playlist and it can be cached
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_playlist(track_name, artists, diversity, playlist_length):
+    # Get initial recommendations
+    similar_songs = load_recommender().recommend_by_song_name(
+        track_name, 
+        artists, 
+        n=min(50, playlist_length * 3)  # Get more than needed for diversity
+    )
+    if not similar_songs:
+        return []
+    
+    # Always include the seed song
+    playlist = [{
+        'track_name': track_name,
+        'artists': artists,
+        'is_seed': True
+    }]
+    
+    # Use diversity parameter to select songs
+    # Higher diversity = more random selection from recommendations
+    if diversity < 0.3:
+        # Low diversity - take top matches
+        selected_songs = similar_songs[:playlist_length-1]
+    else:
+        # Higher diversity - mix in some variety
+        top_picks = max(2, int((1-diversity) * playlist_length))
+        random_picks = playlist_length - 1 - top_picks
+        
+        selected_songs = similar_songs[:top_picks]
+        
+        if random_picks > 0 and len(similar_songs) > top_picks:
+            rng = random.Random(repr((track_name, artists, diversity, playlist_length)))
+            random_indices = rng.sample(
+                range(top_picks, len(similar_songs)), 
+                min(random_picks, len(similar_songs) - top_picks)
+            )
+            # Gather the picks by index without building an intermediate list
+            selected_songs.extend(map(similar_songs.__getitem__, random_indices))
+    
+    # Add to playlist, the recommendations already carry the name, artist and score
+    playlist.extend({**song, 'is_seed': False} for song in selected_songs)
+    return playlist
+
+# Show recommended songs as a single table, one widget instead of a row of columns per song
+def show_matches(songs):
+    st.dataframe(
+        pd.DataFrame({
+            'Song': [song['track_name'] for song in songs],
+            'Artist': [song['artists'] for song in songs],
+            'Match': [song['similarity_score'] for song in songs],
+        }),
+        hide_index=True,
+        use_container_width=True,
+        column_config={'Match': st.column_config.NumberColumn(format="%.2f")},
+    )
+
 # Main function
 def main():
     # Header
@@ -78,7 +170,7 @@ def main():
         
         if search_query:
             with st.spinner("Searching..."):
-                results = recommender.search_songs(search_query, limit=10)
+                results = search_songs(search_query, limit=10)
             
             if results:
                 # Display results as selectable options
@@ -108,16 +200,7 @@ def main():
                             # Show recommendations
                             st.subheader("Similar Songs:")
                             
-                            # Create columns for recommendations
-                            for i, song in enumerate(similar_songs):
-                                col1, col2, col3 = st.columns([3, 2, 1])
-                                with col1:
-                                    st.write(f"**{song['track_name']}**")
-                                with col2:
-                                    st.write(f"by {song['artists']}")
-                                with col3:
-                                    st.write(f"Match: {song['similarity_score']:.2f}")
-                                st.divider()
+                            show_matches(similar_songs)
                         else:
                             st.info("No similar songs found.")
             else:
@@ -140,6 +223,7 @@ def main():
             feature_values['energy'] = st.slider("Energy", 0.0, 1.0, 0.5)
             feature_values['acousticness'] = st.slider("Acousticness", 0.0, 1.0, 0.5)
             feature_values['valence'] = st.slider("Positivity", 0.0, 1.0, 0.5)
+            feature_values['loudness'] = st.slider("Loudness (Normalized)", 0.0, 1.0, 0.5)
         
         with col2:
             feature_values['instrumentalness'] = st.slider("Instrumentalness", 0.0, 1.0, 0.2)
@@ -148,80 +232,39 @@ def main():
             feature_values['tempo'] = st.slider("Tempo (Normalized)", 0.0, 1.0, 0.5)
         
         # Create visualization
-        fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
-        features = list(feature_values.keys())
-        values = list(feature_values.values())
-        
-        # Number of variables
-        N = len(features)
+        # Round the values so slider jitter below the displayed precision reuses the cached chart
+        st.pyplot(radar_chart(tuple(feature_values), tuple(round(v, 2) for v in feature_values.values())))
         
-        # Angle of each axis
-        angles = [n / float(N) * 2 * np.pi for n in range(N)]
-        angles += angles[:1]  # Close the loop
-        
-        # Values for each axis
-        values = np.array(values)
-        values = np.append(values, values[0])  # Close the loop
-        
-        # Draw the chart
-        ax.plot(angles, values, linewidth=2, linestyle='solid')
-        ax.fill(angles, values, alpha=0.25)
-        
-        # Set labels
-        plt.xticks(angles[:-1], [f.title() for f in features], size=8)
-        
-        # Display the chart
-        st.pyplot(fig)
+        # Once the sliders have been moved, start scoring their values in the background
+        # so the results are usually ready by the time the button is pressed
+        feature_key = tuple(feature_values.items())
+        last_key = st.session_state.get('feature_prefetch_key')
+        st.session_state.feature_prefetch_key = feature_key
+        if last_key is not None and last_key != feature_key:
+            # Drop this session's superseded search if the worker hasn't started it yet
+            previous = st.session_state.get('feature_prefetch')
+            if previous is not None:
+                previous.cancel()
+            st.session_state.feature_prefetch = prefetch_executor().submit(
+                recommender.recommend_by_features, dict(feature_values), 10
+            )
         
         # Get recommendations based on features
         if st.button("Find Songs With These Features"):
-            # Create feature vector
-            # Make sure the order matches what the recommender expects
-            feature_vector = np.array([
-                feature_values[feature] for feature in recommender.audio_features
-            ]).reshape(1, -1)
-            
             with st.spinner("Finding songs with these characteristics..."):
                 try:
-                    # Find similar songs using batch processing
-                    batch_size = MODEL_PARAMS['batch_size']
-                    similarities = []
-                    
-                    for i in range(0, len(recommender.feature_matrix), batch_size):
-                        batch = recommender.feature_matrix.iloc[i:i+batch_size]
-                        batch_features = batch[recommender.audio_features].values
-                        
-                        batch_similarities = cosine_similarity(feature_vector, batch_features)[0]
-                        
-                        for j, sim in enumerate(batch_similarities):
-                            similarities.append((i+j, sim))
-                    
-                    # Sort by similarity
-                    similarities.sort(key=lambda x: x[1], reverse=True)
+                    # The prefetch always belongs to the current sliders, use it if it is running or
+                    # done, but search directly rather than wait behind other queued searches
+                    prefetch = st.session_state.get('feature_prefetch')
+                    if prefetch is not None and not prefetch.cancel():
+                        matches = prefetch.result()
+                    else:
+                        matches = recommender.recommend_by_features(feature_values, n=10)
                     
                     # Get top matches
                     st.subheader("Songs matching your preferences:")
                     
-                    col1, col2, col3 = st.columns([3, 2, 1])
-                    with col1:
-                        st.write("**Song**")
-                    with col2:
-                        st.write("**Artist**")
-                    with col3:
-                        st.write("**Match**")
-                    st.divider()
-                    
-                    for idx, sim in similarities[:10]:
-                        song = recommender.feature_matrix.iloc[idx]
-                        
-                        col1, col2, col3 = st.columns([3, 2, 1])
-                        with col1:
-                            st.write(f"{song['track_name']}")
-                        with col2:
-                            st.write(f"{song['artists']}")
-                        with col3:
-                            st.write(f"{sim:.2f}")
-                        st.divider()
+                    show_matches(matches)
                 except Exception as e:
                     st.error(f"Error finding songs: {str(e)}")
     
@@ -240,7 +283,8 @@ def main():
         
         if seed_query and st.button("Generate Playlist"):
             with st.spinner("Searching for seed song..."):
-                seed_results = recommender.search_songs(seed_query, limit=5)
+                # Only the top match is used, it is the same song Tab 1 and the home page list first
+                seed_results = search_songs(seed_query, limit=1)
             
             if seed_results:
                 seed_song = seed_results[0]  # Use the top match
@@ -249,68 +293,24 @@ def main():
                 
                 with st.spinner("Generating playlist..."):
                     try:
-                        # Get initial recommendations
-                        similar_songs = recommender.recommend_by_song_name(
-                            seed_song['track_name'], 
-                            seed_song['artists'], 
-                            n=min(50, playlist_length * 3)  # Get more than needed for diversity
+                        playlist = build_playlist(
+                            seed_song['track_name'], seed_song['artists'], round(diversity, 2), playlist_length
                         )
                         
-                        if similar_songs:
-                            # Add diversity by adjusting the selection
-                            playlist = []
-                            
-                            # Always include the seed song
-                            playlist.append({
-                                'track_name': seed_song['track_name'],
-                                'artists': seed_song['artists'],
-                                'is_seed': True
-                            })
-                            
-                            # Use diversity parameter to select songs
-                            # Higher diversity = more random selection from recommendations
-                            if diversity < 0.3:
-                                # Low diversity - take top matches
-                                selected_songs = similar_songs[:playlist_length-1]
-                            else:
-                                # Higher diversity - mix in some variety
-                                top_picks = max(2, int((1-diversity) * playlist_length))
-                                random_picks = playlist_length - 1 - top_picks
-                                
-                                selected_songs = similar_songs[:top_picks]
-                                
-                                if random_picks > 0 and len(similar_songs) > top_picks:
-                                    import random
-                                    random_indices = random.sample(
-                                        range(top_picks, len(similar_songs)), 
-                                        min(random_picks, len(similar_songs) - top_picks)
-                                    )
-                                    selected_songs.extend([similar_songs[i] for i in random_indices])
-                            
-                            # Add to playlist
-                            for song in selected_songs:
-                                playlist.append({
-                                    'track_name': song['track_name'],
-                                    'artists': song['artists'],
-                                    'similarity_score': song['similarity_score'],
-                                    'is_seed': False
-                                })
-                            
+                        if playlist:
                             # Display playlist
                             st.subheader("Your Custom Playlist:")
                             
-                            for i, song in enumerate(playlist):
-                                col1, col2, col3 = st.columns([1, 3, 2])
-                                with col1:
-                                    st.write(f"**{i+1}.**")
-                                with col2:
-                                    if song.get('is_seed', False):
-                                        st.write(f"**{song['track_name']}** (Seed Song)")
-                                    else:
-                                        st.write(f"**{song['track_name']}**")
-                                with col3:
-                                    st.write(f"{song['artists']}")
-                                st.divider()
+                            # One table for the whole playlist, the seed song is starred
+                            st.dataframe(
+                                pd.DataFrame({
+                                    '#': range(1, len(playlist) + 1),
+                                    'Song': [('⭐ ' if song['is_seed'] else '') + song['track_name'] for song in playlist],
+                                    'Artist': [song['artists'] for song in playlist],
+                                }),
+                                hide_index=True,
+                                use_container_width=True,
+                            )
                         else:
                             st.info("Could not generate recommendations for this seed song.")
                     except Exception as e:
@@ -0,0 +1,175 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+import models.recommender as recommender_module
+from models.recommender import SongRecommender
+
+
+@pytest.fixture
+def small_feature_matrix(tmp_path):
+    """a feature matrix small enough for the int8 shortlist to cover every song"""
+    rng = np.random.default_rng(0)
+    n = 50
+    df = pd.DataFrame({
+        'track_id': [f'id{i}' for i in range(n)],
+        'track_name': [f's{i}' for i in range(n)],
+        'artists': [f'a{i}' for i in range(n)],
+        'album_name': [f'al{i}' for i in range(n)],
+    })
+    for feature in SongRecommender().audio_features:
+        df[feature] = rng.random(n)
+    path = tmp_path / 'feature_matrix.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('quantized', [False, True])
+def test_exact_search_excludes_seed_song(small_feature_matrix, monkeypatch, quantized):
+    monkeypatch.setattr(recommender_module, 'AnnoyIndex', None)
+    monkeypatch.setattr(recommender_module, 'hnswlib', None)
+    if quantized and recommender_module.njit is None:
+        pytest.skip("numba is not installed")
+    if not quantized:
+        monkeypatch.setattr(recommender_module, 'njit', None)
+    
+    recommender = SongRecommender(str(small_feature_matrix))
+    assert recommender.index is None
+    assert (recommender._Xq is not None) == quantized
+    
+    for n in (3, 50):
+        names = [song['track_name'] for song in recommender.recommend_by_song_name('s0', n=n)]
+        assert 's0' not in names
+        assert len(names) == min(n, 49)
+
+
+def test_corrupt_binary_copy_falls_back_to_csv(small_feature_matrix):
+    SongRecommender(str(small_feature_matrix))
+    metadata_path = small_feature_matrix.with_suffix('.parquet')
+    data = metadata_path.read_bytes()
+    metadata_path.write_bytes(data[:len(data) // 2])
+    
+    recommender = SongRecommender(str(small_feature_matrix))
+    assert len(recommender.feature_matrix) == 50
+    assert recommender.search_songs('s1', limit=1)[0]['track_name'] == 's1'
+
+
+def test_unsavable_metadata_still_loads(small_feature_matrix):
+    pytest.importorskip('pyarrow')
+    recommender = SongRecommender()
+    recommender._load_csv(str(small_feature_matrix))
+    #read_csv produces object columns like this for large files with mixed values
+    recommender.feature_matrix['album_name'] = pd.Series(
+        [i if i % 2 else f'al{i}' for i in range(50)], dtype=object
+    )
+    recommender._save_binary_copy(str(small_feature_matrix.with_suffix('.parquet')),
+                                  str(small_feature_matrix.with_suffix('.npy')))
+    
+    assert not small_feature_matrix.with_suffix('.parquet').exists()
+    assert not list(small_feature_matrix.parent.glob('*.tmp'))
+
+
+def test_search_order_does_not_depend_on_limit(tmp_path):
+    df = pd.DataFrame({
+        'track_name': ['Glove Story', 'Love Song', 'Beloved', 'Love Me'],
+        'artists': ['a0', 'a1', 'a2', 'a3'],
+    })
+    for feature in SongRecommender().audio_features:
+        df[feature] = 0.5
+    path = tmp_path / 'feature_matrix.csv'
+    df.to_csv(path, index=False)
+    
+    recommender = SongRecommender(str(path))
+    full = [song['track_name'] for song in recommender.search_songs('love', limit=10)]
+    assert full[:2] == ['Love Song', 'Love Me']
+    for limit in range(1, 5):
+        assert [song['track_name'] for song in recommender.search_songs('love', limit=limit)] == full[:limit]
+
+
+@pytest.mark.parametrize('backend, suffix', [('annoy', '.ann'), ('hnswlib', '.hnsw')])
+def test_truncated_index_is_rebuilt(small_feature_matrix, monkeypatch, backend, suffix):
+    pytest.importorskip(backend)
+    if backend == 'hnswlib':
+        monkeypatch.setattr(recommender_module, 'AnnoyIndex', None)
+    SongRecommender(str(small_feature_matrix))
+    index_path = small_feature_matrix.with_suffix(suffix)
+    data = index_path.read_bytes()
+    index_path.write_bytes(data[:len(data) // 2 + 1])
+    
+    recommender = SongRecommender(str(small_feature_matrix))
+    assert recommender.index is not None
+    names = [song['track_name'] for song in recommender.recommend_by_song_name('s0', n=3)]
+    assert len(names) == 3 and 's0' not in names
+    assert not list(small_feature_matrix.parent.glob('*.tmp'))
+
+
+def test_kernels_can_be_called_from_several_threads():
+    if recommender_module.njit is None:
+        pytest.skip("numba is not installed")
+    #run in a fresh process, numba aborts the whole interpreter when a kernel isn't threadsafe
+    script = textwrap.dedent(f"""
+        import sys, threading
+        import numpy as np
+        sys.path.insert(0, {str(Path(__file__).parent.parent)!r})
+        from models.recommender import _dot_all, _cos_all_int8, _quantize
+        X = np.random.default_rng(0).random((20000, 9)).astype(np.float32)
+        Xq, norms = _quantize(X)
+        def work():
+            out = np.empty(len(X), dtype=np.float32)
+            for _ in range(100):
+                _dot_all(X[0], X, out)
+                _cos_all_int8(Xq[0], norms[0], Xq, norms, out)
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    """)
+    env = dict(os.environ, NUMBA_THREADING_LAYER='workqueue', NUMBA_NUM_THREADS='4')
+    result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+
+
+def test_feature_search_alongside_prefetch_worker(small_feature_matrix):
+    #the recommendations page prefetches on a worker thread while session threads search too
+    script = textwrap.dedent(f"""
+        import sys
+        from concurrent.futures import ThreadPoolExecutor
+        sys.path.insert(0, {str(Path(__file__).parent.parent)!r})
+        import models.recommender as recommender_module
+        recommender_module.AnnoyIndex = None
+        recommender_module.hnswlib = None
+        recommender = recommender_module.SongRecommender({str(small_feature_matrix)!r})
+        queries = [{{feature: (i + j) % 7 / 7 + 0.1 for j, feature in enumerate(recommender.audio_features)}}
+                   for i in range(40)]
+        expected = [recommender.recommend_by_features(query, 5) for query in queries]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(20):
+                assert list(executor.map(lambda query: recommender.recommend_by_features(query, 5), queries)) == expected
+    """)
+    env = dict(os.environ, NUMBA_THREADING_LAYER='workqueue', NUMBA_NUM_THREADS='4')
+    result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+
+
+def test_search_ranks_whole_words_in_any_script(tmp_path):
+    df = pd.DataFrame({
+        'track_name': ['Mediodía', 'Buen Día', 'Día-Noche', 'Lovely'],
+        'artists': ['a0', 'a1', 'a2', 'a3'],
+    })
+    for feature in SongRecommender().audio_features:
+        df[feature] = 0.5
+    path = tmp_path / 'feature_matrix.csv'
+    df.to_csv(path, index=False)
+    
+    recommender = SongRecommender(str(path))
+    assert [song['track_name'] for song in recommender.search_songs('día')] == ['Buen Día', 'Día-Noche', 'Mediodía']
+    assert recommender.search_songs('zzz') == []
+    assert recommender.search_songs('ñ') == []